@@ -1,6 +1,8 @@
-import io
+import time
+from typing import Iterator, List, Tuple
 
 import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from src.config import (
     GENAI_API_KEY,
@@ -17,6 +19,77 @@ from src.contract_recommender import ContractRecommender
 from src.ui import render_results_table, render_score_bar
 
 
+@st.cache_resource
+def get_pinecone() -> PineconeClient:
+    """Create the PineconeClient once and share it across reruns and sessions."""
+    return PineconeClient(
+        api_key=PINECONE_API_KEY,
+        cloud=PINECONE_CLOUD,
+        region=PINECONE_REGION,
+        index_name=PINECONE_INDEX,
+        dimension=PINECONE_DIMENSION,
+        metric=PINECONE_METRIC,
+    )
+
+
+@st.cache_resource
+def get_embed_service() -> EmbeddingService:
+    """Create the EmbeddingService once and share it across reruns and sessions."""
+    return EmbeddingService(api_key=GENAI_API_KEY)
+
+
+@st.cache_resource
+def get_recommender() -> ContractRecommender:
+    """Create the ContractRecommender once on top of the cached clients."""
+    return ContractRecommender(
+        embedding_service=get_embed_service(), pinecone_client=get_pinecone()
+    )
+
+
+@st.cache_data(ttl=30)
+def _total_vectors(_client: PineconeClient) -> int:
+    """
+    Count the vectors currently in the index. Cached for 30 seconds so that
+    widget interactions do not each cost a describe_index_stats round trip;
+    call _total_vectors.clear() after writing to the index.
+    """
+    stats = _client.index.describe_index_stats()
+    namespaces = stats.get("namespaces", {})
+    return sum(ns.get("vector_count", 0) for ns in namespaces.values())
+
+
+# How long (seconds) the post-indexing vector count may override the fetched
+# one; it is a lower bound, so this only guards against vectors deleted
+# elsewhere in the meantime.
+_EXPECTED_COUNT_TTL = 120
+
+
+def _current_vector_count(client: PineconeClient) -> int:
+    """
+    Return the index vector count, holding the lower bound recorded after
+    indexing until describe_index_stats catches up with it (the stats are
+    eventually consistent) or the estimate expires.
+    """
+    total = _total_vectors(client)
+    expected = st.session_state.get("expected_vectors")
+    if expected is not None:
+        count, recorded_at = expected
+        if total < count and time.monotonic() - recorded_at < _EXPECTED_COUNT_TTL:
+            return count
+        del st.session_state["expected_vectors"]
+    return total
+
+
+def pdf_stream(uploaded_files: List[UploadedFile]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (contract_id, pdf_bytes) for each upload as the indexer asks for it.
+    Streamlit already holds the uploads in memory and read() returns that
+    buffer without copying, so this feeds the indexer rather than saving RAM.
+    """
+    for pdf in uploaded_files:
+        yield pdf.name.rsplit(".", 1)[0], pdf.read()
+
+
 def main() -> None:
     """Entry point for the ClauseRadar Streamlit application."""
     st.set_page_config(
@@ -27,20 +100,11 @@ def main() -> None:
 
     st.sidebar.title("🔍 ClauseRadar")
 
-    # Instantiate PineconeClient early to fetch index stats
-    pinecone_client = PineconeClient(
-        api_key=PINECONE_API_KEY,
-        cloud=PINECONE_CLOUD,
-        region=PINECONE_REGION,
-        index_name=PINECONE_INDEX,
-        dimension=PINECONE_DIMENSION,
-        metric=PINECONE_METRIC,
-    )
+    pinecone_client = get_pinecone()
+    recommender = get_recommender()
 
     # Determine how many vectors currently exist in the index
-    stats = pinecone_client.index.describe_index_stats()
-    namespaces = stats.get("namespaces", {})
-    total_vectors = sum(ns.get("vector_count", 0) for ns in namespaces.values())
+    total_vectors = _current_vector_count(pinecone_client)
     # Ensure max_k is at least 1 so the slider is valid
     max_k = total_vectors if total_vectors > 0 else 1
 
@@ -65,30 +129,22 @@ def main() -> None:
             st.sidebar.error("🔺 Please enter at least one keyword or phrase.")
         else:
             with st.spinner("Indexing…"):
-                contract_files: dict[str, io.BytesIO] = {}
-                for pdf in uploaded_files:
-                    pdf_bytes = pdf.read()
-                    contract_id = pdf.name.rsplit(".", 1)[0]
-                    contract_files[contract_id] = io.BytesIO(pdf_bytes)
-
-                embed_service = EmbeddingService(api_key=GENAI_API_KEY)
-                # Reuse the same pinecone_client to avoid reinitializing
-                recommender = ContractRecommender(
-                    embedding_service=embed_service, pinecone_client=pinecone_client
+                summary = recommender.index_contracts(
+                    pdf_stream(uploaded_files), keywords_list
                 )
 
-                recommender.index_contracts(contract_files, keywords_list)
-
             st.sidebar.success("✅ Indexing complete!")
             st.sidebar.info(
-                f"Indexed {len(contract_files)} contract(s) against "
+                f"Indexed {summary.contracts} contract(s) against "
                 f"{len(keywords_list)} keyword(s)."
             )
 
-            # Recompute total_vectors after indexing
-            stats = pinecone_client.index.describe_index_stats()
-            namespaces = stats.get("namespaces", {})
-            total_vectors = sum(ns.get("vector_count", 0) for ns in namespaces.values())
+            # Index stats lag behind upserts, so keep a lower bound in
+            # session_state until a fetched count catches up with it. Re-indexed
+            # IDs overwrite their vectors, so the upserts are not added on top.
+            _total_vectors.clear()
+            total_vectors = max(total_vectors, summary.vectors)
+            st.session_state["expected_vectors"] = (total_vectors, time.monotonic())
             max_k = total_vectors if total_vectors > 0 else 1
 
     st.sidebar.markdown("---")
@@ -104,47 +160,15 @@ def main() -> None:
         "Number of results to return", 1, max_k, min(5, max_k)
     )
 
-    # Handle search button click: perform embedding + Pinecone, store results
+    # Handle search button click: embed + query Pinecone, store results
     if st.sidebar.button("🔎 Search"):
         if not search_query.strip():
             st.sidebar.error("🔺 Enter a keyword or phrase before searching.")
         else:
-            embed_service = EmbeddingService(api_key=GENAI_API_KEY)
-            recommender = ContractRecommender(
-                embedding_service=embed_service, pinecone_client=pinecone_client
-            )
-
-            # Progress bar and status text
-            progress = st.progress(0)
-            status_text = st.empty()
-
-            # Step 1: Embed the query
-            status_text.text("🛰️ Embedding search query…")
-            query_emb = embed_service.embed_text(search_query)
-            progress.progress(50)
-
-            # Step 2: Query Pinecone
-            status_text.text("🔍 Querying Pinecone for similar clauses…")
-            raw_matches = pinecone_client.query(query_emb, top_k=top_k)
-            progress.progress(100)
-
-            # Clear progress indicators
-            progress.empty()
-            status_text.empty()
-
-            # Build a simple list of dicts and store in session_state
-            session_results = []
-            for match in raw_matches:
-                meta = match["metadata"]
-                session_results.append(
-                    {
-                        "contract_id": meta["contract_id"],
-                        "keyword": meta["keyword"],
-                        "score": match["score"],
-                        "snippet": meta["snippet"],
-                    }
+            with st.spinner("🔍 Searching contracts for similar clauses…"):
+                st.session_state["results"] = recommender.recommend(
+                    search_query, top_k=top_k
                 )
-            st.session_state["results"] = session_results
 
     # If results exist in session_state, display them
     if "results" in st.session_state:
@@ -160,7 +184,7 @@ def main() -> None:
             render_score_bar(results)
 
             labels = [
-                f"{i + 1}: {row['contract_id']} – {row['keyword']}"
+                f"{i + 1}: {row.contract_id} – {row.keyword}"
                 for i, row in enumerate(results)
             ]
             selection = st.selectbox("View full snippet for:", [""] + labels)
@@ -168,10 +192,10 @@ def main() -> None:
                 idx = int(selection.split(":")[0]) - 1
                 chosen = results[idx]
                 st.markdown("**Full Snippet:**")
-                st.write(chosen["snippet"])
+                st.write(chosen.snippet)
                 st.info(
                     f"🔗 To download the entire PDF for "
-                    f"“{chosen['contract_id']},” use your local copy."
+                    f"“{chosen.contract_id},” use your local copy."
                 )
 
 
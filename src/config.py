@@ -11,6 +11,8 @@ GENAI_API_KEY = os.environ["GOOGLE_API_KEY"]
 PINECONE_API_KEY = os.environ["PINECONE_API_KEY"]
 PINECONE_INDEX = os.environ["PINECONE_INDEX"]
 PINECONE_DIMENSION = int(os.environ["PINECONE_DIMENSION"])
+# Vectors are L2-normalized before upsert/query, so "dotproduct" ranks the
+# same as "cosine" with less work per query.
 PINECONE_METRIC = os.environ["PINECONE_METRIC"]
 PINECONE_CLOUD = os.environ["PINECONE_CLOUD"]
 PINECONE_REGION = os.environ["PINECONE_REGION"]
@@ -18,3 +20,13 @@ PINECONE_REGION = os.environ["PINECONE_REGION"]
 # Default LLM and embedding model names
 LLM_MODEL = "gemini-2.0-flash"
 EMBEDDING_MODEL = "models/embedding-001"
+
+# Persistent snippet-embedding cache (SQLite database file)
+EMBED_CACHE_PATH = os.environ.get(
+    "EMBED_CACHE_PATH", os.path.join("~", ".clauseradar", "embed_cache.db")
+)
+# Lifetime (seconds) of persisted snippet embeddings; older rows are pruned
+EMBED_CACHE_TTL = int(os.environ.get("EMBED_CACHE_TTL", str(30 * 24 * 3600)))
+
+# Lifetime (seconds) of cached search-query embeddings
+QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL", "3600"))
@@ -1,12 +1,68 @@
-import io
+import multiprocessing
+import os
 import re
 import hashlib
-from typing import Any, Dict, List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import pdfplumber
+import pymupdf
 
+from src.embedding_cache import SqliteEmbeddingCache
 from src.embedding_service import EmbeddingService
 from src.pinecone_client import PineconeClient
+from src.utils import l2_normalize
+
+# Worker processes must not be forked from the app: Streamlit's server and
+# the Pinecone upsert pool are threaded, and forking a threaded process can
+# deadlock the child.
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Characters of context kept before and after a keyword match
+_SNIPPET_BEFORE = 50
+_SNIPPET_AFTER = 250
+
+
+@lru_cache(maxsize=32)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern:
+    """
+    Compile a single case-insensitive regex matching any of the keywords.
+    The alternation sits inside a lookahead so overlapping matches are
+    still visited; the named group k<i> identifies keywords[i].
+    """
+    alternation = "|".join(
+        f"(?P<k{i}>{re.escape(keyword)})" for i, keyword in enumerate(keywords)
+    )
+    return re.compile(f"(?=(?:{alternation}))", re.IGNORECASE)
+
+
+@dataclass(slots=True, frozen=True)
+class Match:
+    """
+    A single search result: the snippet indexed for (contract_id, keyword)
+    and its similarity score to the query.
+    """
+
+    contract_id: str
+    keyword: str
+    score: float
+    snippet: str
+
+
+@dataclass(slots=True, frozen=True)
+class IndexSummary:
+    """
+    The outcome of one index_contracts call: how many distinct contracts were
+    indexed and how many vectors were upserted for them.
+    """
+
+    contracts: int
+    vectors: int
 
 
 class ContractRecommender:
@@ -22,6 +78,7 @@ class ContractRecommender:
             self,
             embedding_service: EmbeddingService,
             pinecone_client: PineconeClient,
+            embedding_cache: Optional[SqliteEmbeddingCache] = None,
     ) -> None:
         """
         Initialize the ContractRecommender.
@@ -29,117 +86,245 @@ class ContractRecommender:
         Args:
             embedding_service: Instance of EmbeddingService for embeddings.
             pinecone_client: Instance of PineconeClient for vector operations.
+            embedding_cache: Persistent snippet_hash → embedding cache.
+                If None, opens the default SqliteEmbeddingCache.
         """
         self.embedder = embedding_service
         self.pinecone = pinecone_client
-        # In‐memory cache: snippet_hash → embedding vector
-        self._cache: Dict[str, List[float]] = {}
+        # Persistent cache: (model, snippet_hash) → embedding vector
+        self._cache = embedding_cache or SqliteEmbeddingCache()
 
     @staticmethod
     def _hash_text(text: str) -> str:
         """
-        Compute a SHA-256 hash of the given text for deduplication.
+        Compute a 128-bit BLAKE2b hash of the given text for deduplication.
+        Only used as a dedupe and cache key, so speed matters more than strength.
+        """
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _embedding_text(snippet: str) -> str:
+        """
+        Collapse runs of whitespace so the same clause wrapped differently in
+        two PDFs is embedded (and cached) only once.
         """
-        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return " ".join(snippet.split())
 
     @staticmethod
-    def _extract_all_text(pdf_file: io.BytesIO) -> str:
+    def _first_positions(text: str, keywords: List[str]) -> Dict[str, int]:
         """
-        Given a file-like object for a PDF, extract all text sequentially.
+        Search the text once and return the offset of the first occurrence of
+        every keyword (case-insensitive). Keywords that are not found are
+        omitted from the result.
         """
-        full_text = ""
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += "\n" + text
-        return full_text
+        # Longest first: at any position the alternation reports the first
+        # keyword that matches, so a keyword can only be hidden there by a
+        # longer keyword it is a prefix of (e.g. "Term" by "Termination").
+        ordered = sorted(set(keywords), key=lambda k: (-len(k), k))
+        if not ordered:
+            return {}
+
+        seen: Dict[str, int] = {}
+        for match in _keyword_pattern(tuple(ordered)).finditer(text):
+            keyword = ordered[int(match.lastgroup[1:])]
+            seen.setdefault(keyword, match.start())
+            if len(seen) == len(ordered):
+                break
+
+        first_pos: Dict[str, int] = {}
+        for keyword in ordered:
+            # Wherever a longer keyword matched, its prefixes matched too
+            folded = keyword.lower()
+            positions = [
+                pos for other, pos in seen.items()
+                if other.lower().startswith(folded)
+            ]
+            if positions:
+                first_pos[keyword] = min(positions)
+        return first_pos
 
     @staticmethod
-    def _find_snippet(full_text: str, keyword: str) -> str:
-        """
-        Search the full_text for the first occurrence of the keyword (case-insensitive).
-        If found, return ~300 characters around that match for context.
-        If not found exactly, return an empty string.
-        """
-        pattern = rf"(?i){re.escape(keyword)}"
-        match = re.search(pattern, full_text)
-        if not match:
-            return ""
-        start = max(0, match.start() - 50)
-        end = min(len(full_text), match.end() + 250)
+    def _snippet_at(full_text: str, keyword: str, pos: int) -> str:
+        """
+        Return ~300 characters of context around the keyword match that
+        starts at offset pos in full_text.
+        """
+        start = max(0, pos - _SNIPPET_BEFORE)
+        end = min(len(full_text), pos + len(keyword) + _SNIPPET_AFTER)
         return full_text[start:end].strip()
 
+    @classmethod
+    def _mine_snippets(cls, pdf_bytes: bytes, keywords: List[str]) -> Dict[str, str]:
+        """
+        Given the raw bytes of a PDF, read it page by page and return the
+        snippet around the first occurrence of every keyword found
+        (case-insensitive). Reading stops once every keyword has been located
+        and enough trailing context has been read for its snippet.
+        Takes bytes rather than a file object so it can run in a worker process.
+        """
+        if not keywords:
+            return {}
+
+        remaining = set(keywords)
+        # keyword → offset of its first match in the joined page texts
+        first_pos: Dict[str, int] = {}
+        # Collect page texts and join once; repeated += copies the growing
+        # string on every page.
+        parts: List[str] = []
+        # Offset of the current page in the joined text
+        offset = 0
+        # Characters read after the page on which the last keyword was found
+        trailing = 0
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as pdf:
+            for page in pdf:
+                text = page.get_text("text")
+                if not text:
+                    continue
+                parts.append(text)
+                if remaining:
+                    # Keywords are single-line phrases, so no match can span
+                    # the newline that joins pages; scanning this page suffices.
+                    found = cls._first_positions(text, list(remaining))
+                    for keyword, pos in found.items():
+                        first_pos[keyword] = offset + pos
+                    remaining -= found.keys()
+                else:
+                    trailing += len(text) + 1
+                offset += len(text) + 1
+                if not remaining and trailing >= _SNIPPET_AFTER:
+                    break
+
+        full_text = "\n".join(parts)
+        return {
+            keyword: cls._snippet_at(full_text, keyword, pos)
+            for keyword, pos in first_pos.items()
+        }
+
+    def _mine_all(
+            self,
+            contract_files: Iterable[Tuple[str, bytes]],
+            keywords: List[str],
+    ) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        Yield (contract_id, snippets) for each (contract_id, pdf_bytes).
+
+        PDF parsing is CPU-bound, so several PDFs are mined in parallel worker
+        processes. contract_files is consumed lazily: at most two pickled PDFs
+        per worker are queued to the pool at once, so a caller that produces
+        the bytes on demand does not have to materialise the whole batch.
+        """
+        files = iter(contract_files)
+        head = list(islice(files, 2))
+        if len(head) < 2:
+            # A single PDF is not worth starting a process pool for
+            for contract_id, pdf_bytes in head:
+                yield contract_id, self._mine_snippets(pdf_bytes, keywords)
+            return
+
+        files = chain(head, files)
+
+        workers = os.cpu_count() or 1
+        in_flight: Deque[Tuple[str, Future]] = deque()
+        with ProcessPoolExecutor(
+                max_workers=workers, mp_context=_MP_CONTEXT
+        ) as executor:
+            for contract_id, pdf_bytes in files:
+                future = executor.submit(self._mine_snippets, pdf_bytes, keywords)
+                in_flight.append((contract_id, future))
+                if len(in_flight) >= 2 * workers:
+                    done_id, future = in_flight.popleft()
+                    yield done_id, future.result()
+            while in_flight:
+                done_id, future = in_flight.popleft()
+                yield done_id, future.result()
+
     def index_contracts(
             self,
-            contract_files: Dict[str, io.BytesIO],
+            contract_files: Iterable[Tuple[str, bytes]],
             keywords: List[str],
-    ) -> None:
+    ) -> IndexSummary:
         """
-        For each (contract_id, file_bytes):
-          1. Extract text.
-          2. For each keyword, find snippet.
-          3. Embed snippet (with caching).
-          4. Upsert to Pinecone under ID "contract_id::keyword".
+        For each (contract_id, pdf_bytes), read lazily from contract_files:
+          1. Stream the PDF text and find a snippet for every keyword
+             (in parallel worker processes).
+          2. Deduplicate snippets by their whitespace-normalized text, embed
+             the uncached ones in batched requests and L2-normalize the vectors.
+          3. Upsert to Pinecone under ID "contract_id::keyword".
+
+        Returns an IndexSummary with the number of distinct contract_ids
+        indexed and the number of vectors upserted.
         """
-        vectors_to_upsert: List[tuple[str, List[float], Dict[str, Any]]] = []
+        # contract_id → snippets; a later upload of the same contract_id
+        # replaces every snippet of the earlier one
+        per_contract: Dict[str, Dict[str, str]] = {}
+        # Embedding and upserting are network-bound and stay on this thread
+        for contract_id, snippets in self._mine_all(contract_files, keywords):
+            per_contract[contract_id] = snippets
 
-        for contract_id, file_bytes in contract_files.items():
-            full_text = self._extract_all_text(file_bytes)
+        # vector_id → (metadata, snippet_hash)
+        pending: Dict[str, tuple[Dict[str, Any], str]] = {}
+        # snippet_hash → text to embed, one entry per distinct clause
+        unique: Dict[str, str] = {}
+        for contract_id, snippets in per_contract.items():
             for keyword in keywords:
-                snippet = self._find_snippet(full_text, keyword)
+                snippet = snippets.get(keyword)
                 if not snippet:
                     continue
 
-                snippet_hash = self._hash_text(snippet)
-                if snippet_hash in self._cache:
-                    emb = self._cache[snippet_hash]
-                else:
-                    emb = self.embedder.embed_text(snippet)
-                    self._cache[snippet_hash] = emb
-
                 vector_id = f"{contract_id}::{keyword}"
                 metadata = {
                     "contract_id": contract_id,
                     "keyword": keyword,
                     "snippet": snippet,
                 }
-                vectors_to_upsert.append((vector_id, emb, metadata))
+                text = self._embedding_text(snippet)
+                snippet_hash = self._hash_text(text)
+                unique[snippet_hash] = text
+                pending[vector_id] = (metadata, snippet_hash)
+
+        model = self.embedder.model
+        embeddings = self._cache.get_many(model, unique)
+        misses = {h: s for h, s in unique.items() if h not in embeddings}
+        if misses:
+            fresh = dict(zip(misses, self.embedder.embed_batch(list(misses.values()))))
+            self._cache.put_many(model, fresh)
+            embeddings.update(fresh)
+
+        # Unit-length vectors make Pinecone's cheaper "dotproduct" metric rank
+        # exactly like "cosine"; normalize each unique embedding once.
+        if embeddings:
+            hashes = list(embeddings)
+            unit = l2_normalize([embeddings[h] for h in hashes]).tolist()
+            embeddings = dict(zip(hashes, unit))
 
-        if vectors_to_upsert:
-            self.pinecone.upsert_batch(vectors_to_upsert)
+        if pending:
+            # Generated lazily; upsert_batch materializes one batch at a time
+            self.pinecone.upsert_batch(
+                (vector_id, embeddings[snippet_hash], metadata)
+                for vector_id, (metadata, snippet_hash) in pending.items()
+            )
+        return IndexSummary(contracts=len(per_contract), vectors=len(pending))
 
     def recommend(
             self,
             user_query: str,
             top_k: int = 5,
-    ) -> List[Dict[str, Any]]:
-        """
-        Embed the user_query, query Pinecone, and return a list of matches:
-          [
-            {
-              "contract_id": ...,
-              "keyword": ...,
-              "score": ...,
-              "snippet": ...,
-            },
-            ...
-          ]
+    ) -> List[Match]:
+        """
+        Embed the user_query, query Pinecone, and return a list of Match
+        records (contract_id, keyword, score, snippet).
 
         Results are sorted descending by score.
         """
-        query_emb = self.embedder.embed_text(user_query)
+        query_emb = l2_normalize(self.embedder.embed_query(user_query)).tolist()
         raw_matches = self.pinecone.query(query_emb, top_k=top_k)
 
-        results: List[Dict[str, Any]] = []
-        for match in raw_matches:
-            meta = match["metadata"]
-            results.append(
-                {
-                    "contract_id": meta["contract_id"],
-                    "keyword": meta["keyword"],
-                    "score": match["score"],
-                    "snippet": meta["snippet"],
-                }
+        return [
+            Match(
+                contract_id=match["metadata"]["contract_id"],
+                keyword=match["metadata"]["keyword"],
+                score=match["score"],
+                snippet=match["metadata"]["snippet"],
             )
-        return results
+            for match in raw_matches
+        ]
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.config import EMBED_CACHE_PATH, EMBED_CACHE_TTL
+
+
+class SqliteEmbeddingCache:
+    """
+    Persistent snippet_hash → embedding cache backed by a SQLite file.
+
+    Entries are keyed on (model, hash) so switching embedding models never
+    serves vectors produced by a different model. Vectors are stored as
+    float32 blobs; entries older than the TTL are ignored and pruned.
+    """
+
+    # Stay well below SQLite's limit on bound parameters per statement
+    _MAX_PARAMS = 500
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[int] = None) -> None:
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: Path to the SQLite file. If None, uses EMBED_CACHE_PATH from config.
+            ttl: Seconds an entry stays valid. If None, uses EMBED_CACHE_TTL from config.
+        """
+        self.path = os.path.expanduser(path or EMBED_CACHE_PATH)
+        self.ttl = ttl if ttl is not None else EMBED_CACHE_TTL
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " hash TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " vec BLOB NOT NULL,"
+                " ts INTEGER NOT NULL,"
+                " PRIMARY KEY (model, hash))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_ts ON embeddings (ts)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per call keeps the cache safe to share
+        # across Streamlit's script threads.
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up several hashes at once.
+
+        Args:
+            model: Embedding model name the vectors were produced with.
+            hashes: Snippet hashes to look up.
+
+        Returns:
+            A dict of hash → embedding vector for the hashes that were cached.
+        """
+        hashes = list(hashes)
+        oldest = int(time.time()) - self.ttl
+        found: Dict[str, List[float]] = {}
+        with closing(self._connect()) as conn:
+            for i in range(0, len(hashes), self._MAX_PARAMS):
+                chunk = hashes[i: i + self._MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    "SELECT hash, vec FROM embeddings"
+                    f" WHERE model = ? AND ts >= ? AND hash IN ({placeholders})",
+                    (model, oldest, *chunk),
+                )
+                for snippet_hash, blob in rows:
+                    found[snippet_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]) -> None:
+        """
+        Store several embeddings at once, replacing existing entries, and
+        prune entries that have outlived the TTL.
+
+        Args:
+            model: Embedding model name the vectors were produced with.
+            embeddings: Dict of hash → embedding vector.
+        """
+        now = int(time.time())
+        rows = [
+            (snippet_hash, model, np.asarray(vec, dtype=np.float32).tobytes(), now)
+            for snippet_hash, vec in embeddings.items()
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vec, ts)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("DELETE FROM embeddings WHERE ts < ?", (now - self.ttl,))
@@ -1,8 +1,75 @@
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 import google.generativeai as genai
 
-from src.config import GENAI_API_KEY, EMBEDDING_MODEL
+from src.config import GENAI_API_KEY, EMBEDDING_MODEL, QUERY_CACHE_TTL
+
+
+class QueryEmbeddingCache:
+    """
+    In-memory cache of search-query embeddings with a TTL.
+
+    Queries are keyed on a normalised form of their text (case-folded,
+    whitespace collapsed, surrounding sentence punctuation stripped), so
+    retyped variants such as "Payment Terms." and "payment terms" share one
+    embedding while "C++" and "C" stay distinct.
+    """
+
+    # Punctuation that only trails or wraps a phrase and does not change it
+    _SURROUNDING_PUNCTUATION = ".,;:!?\"'“”‘’ "
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1024) -> None:
+        """
+        Initialize the QueryEmbeddingCache.
+
+        Args:
+            ttl: Seconds an entry stays valid. If None, entries never expire.
+            max_entries: Maximum number of cached queries; the oldest is
+                evicted first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """
+        Reduce a query to the form used as its cache key. Falls back to the
+        case-folded text when nothing is left after stripping, so queries made
+        only of punctuation never share a key.
+        """
+        folded = " ".join(text.casefold().split())
+        return folded.strip(cls._SURROUNDING_PUNCTUATION) or folded
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Return the cached embedding for text, or None if absent or expired.
+        """
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, embedding = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            return embedding
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        """
+        Cache the embedding for text.
+        """
+        key = self.normalize(text)
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so the first key is the oldest
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic(), embedding)
 
 
 class EmbeddingService:
@@ -14,6 +81,7 @@ class EmbeddingService:
             self,
             api_key: Optional[str] = None,
             model: Optional[str] = None,
+            query_cache_ttl: Optional[float] = None,
     ) -> None:
         """
         Initialize the EmbeddingService.
@@ -21,10 +89,15 @@ class EmbeddingService:
         Args:
             api_key: API key for Google Gemini. If None, uses GENAI_API_KEY from config.
             model: Embedding model name. If None, uses EMBEDDING_MODEL from config.
+            query_cache_ttl: Lifetime in seconds of cached query embeddings.
+                If None, uses QUERY_CACHE_TTL from config.
         """
         self.api_key = api_key or GENAI_API_KEY
         genai.configure(api_key=self.api_key)
         self.model = model or EMBEDDING_MODEL
+        self.query_cache = QueryEmbeddingCache(
+            ttl=query_cache_ttl if query_cache_ttl is not None else QUERY_CACHE_TTL
+        )
 
     def embed_text(self, text: str) -> List[float]:
         """
@@ -43,6 +116,24 @@ class EmbeddingService:
         )
         return response.get("embedding", [])
 
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Generate an embedding vector for a search query, reusing the cached
+        vector when the same (normalised) query was embedded recently.
+
+        Args:
+            text: The search query to embed.
+
+        Returns:
+            A list of floats representing the embedding vector.
+        """
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            embedding = self.embed_text(text)
+            if embedding:
+                self.query_cache.put(text, embedding)
+        return embedding
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Batch‐embed a list of texts by calling embed_text on each.
@@ -54,3 +145,28 @@ class EmbeddingService:
             A list of embedding vectors (one per input string).
         """
         return [self.embed_text(t) for t in texts]
+
+    def embed_batch(
+            self,
+            texts: List[str],
+            batch_size: int = 100,
+    ) -> List[List[float]]:
+        """
+        Embed many texts with one Gemini request per batch_size texts.
+
+        Args:
+            texts: List of input strings.
+            batch_size: Maximum number of texts sent in a single request.
+
+        Returns:
+            A list of embedding vectors, in the same order as texts.
+        """
+        embeddings: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            response = genai.embed_content(
+                model=self.model,
+                content=texts[i: i + batch_size],
+                task_type="retrieval_document",
+            )
+            embeddings.extend(response["embedding"])
+        return embeddings
@@ -1,7 +1,9 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
 
 from pinecone import Pinecone, ServerlessSpec
 
+from src.utils import chunks
+
 
 class PineconeClient:
     """
@@ -20,6 +22,7 @@ class PineconeClient:
             index_name: str,
             dimension: int,
             metric: str,
+            pool_threads: int = 20,
     ) -> None:
         """
         Initialize Pinecone and create the index if it does not exist.
@@ -31,6 +34,7 @@ class PineconeClient:
             index_name: Name of the index to use or create.
             dimension: Dimensionality of the embedding vectors.
             metric: Distance metric for similarity search ("cosine", "euclidean", etc.).
+            pool_threads: Number of threads used for concurrent upsert requests.
         """
         # Create a Pinecone client instance
         self.client = Pinecone(api_key=api_key)
@@ -47,24 +51,38 @@ class PineconeClient:
                 spec=spec,
             )
 
-        # Get a handle to the index
-        self.index = self.client.Index(index_name)
+        # Get a handle to the index, backed by a thread pool for async upserts
+        self.pool_threads = pool_threads
+        self.index = self.client.Index(index_name, pool_threads=pool_threads)
 
     def upsert_batch(
             self,
-            vectors: List[tuple[str, List[float], Dict[str, Any]]],
-            batch_size: int = 100,
+            vectors: Iterable[tuple[str, List[float], Dict[str, Any]]],
+            batch_size: int = 64,
+            max_in_flight: Optional[int] = None,
     ) -> None:
         """
-        Upsert a batch of vectors into Pinecone.
+        Upsert a batch of vectors into Pinecone, sending batches concurrently.
 
         Args:
-            vectors: List of tuples (vector_id, vector_values, metadata_dict).
+            vectors: Iterable of tuples (vector_id, vector_values, metadata_dict).
             batch_size: Number of vectors to upsert in each batch.
+            max_in_flight: Maximum number of outstanding upsert requests.
+                If None, uses pool_threads.
         """
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i: i + batch_size]
-            self.index.upsert(vectors=batch)
+        max_in_flight = max_in_flight or self.pool_threads
+        async_results = []
+        for batch in chunks(vectors, batch_size):
+            async_results.append(self.index.upsert(vectors=batch, async_req=True))
+            if len(async_results) >= max_in_flight:
+                # Wait for the current window so we stay under rate limits;
+                # .get() re-raises any error from the request.
+                for result in async_results:
+                    result.get()
+                async_results = []
+
+        for result in async_results:
+            result.get()
 
     def query(
             self,
@@ -1,7 +1,10 @@
-from typing import Any, List
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Sequence, Union
 
 import numpy as np
 
+ArrayLike = Union[np.ndarray, Sequence[float], Sequence[Sequence[float]]]
+
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
     """
@@ -27,6 +30,40 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return float(np.dot(arr_a, arr_b) / (norm_a * norm_b))
 
 
+def l2_normalize(vectors: ArrayLike) -> np.ndarray:
+    """
+    L2-normalize a vector, or each row of a matrix, as contiguous float32.
+    Zero-magnitude rows are left as zeros.
+
+    Args:
+        vectors: A single vector or a 2-D array of row vectors.
+
+    Returns:
+        A float32 array of the same shape with unit-length rows.
+    """
+    arr = np.array(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    np.divide(arr, norms, out=arr, where=norms > 0)
+    return arr
+
+
+def chunks(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Lazily split an iterable into consecutive lists of given size,
+    holding only one chunk in memory at a time.
+
+    Args:
+        iterable: The input iterable to chunk.
+        size: The desired chunk size.
+
+    Yields:
+        Lists of length <= size.
+    """
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
 def chunk_list(lst: List[Any], size: int) -> List[List[Any]]:
     """
     Split a list into consecutive sublists of given size.
@@ -38,4 +75,4 @@ def chunk_list(lst: List[Any], size: int) -> List[List[Any]]:
     Returns:
         A list of sublists, each of length <= size.
     """
-    return [lst[i: i + size] for i in range(0, len(lst), size)]
+    return list(chunks(lst, size))